@@ -5,6 +5,10 @@ import pandas as pd
 import tensorflow as tf
 import json
 import os
+import queue
+import threading
+import time
+from collections import Counter, deque
 
 app = Flask(__name__)
 CORS(app)
@@ -26,6 +30,175 @@ def load_model():
 # Initialize model on startup
 load_model()
 
+# Shadow mode: a candidate model scored off the request path. Enabled by
+# setting SHADOW_MODEL_PATH; /api/predict only ever enqueues into a bounded
+# queue and drops the sample when the queue is full. The candidate and its
+# worker threads are started lazily in the process that serves requests, so
+# forked servers (gunicorn --preload) and the debug reloader parent never
+# hold a stale copy. Stats are per process.
+shadow_model_path = os.environ.get('SHADOW_MODEL_PATH')
+SHADOW_LATENCY_WINDOW = 1000
+
+shadow_enabled = False
+shadow_queue_size = 256
+shadow_workers = 1
+shadow_batch_size = 32
+
+shadow_model = None
+shadow_queue = None
+shadow_pid = None
+shadow_start_lock = threading.Lock()
+# Workers update shadow_stats under shadow_lock. The request path never takes
+# that lock: drops are counted under shadow_drop_lock, which only requests use.
+shadow_lock = threading.Lock()
+shadow_drop_lock = threading.Lock()
+shadow_dropped = 0
+shadow_stats = {
+    'received': 0,
+    'in_flight': 0,
+    'scored': 0,
+    'errors': 0,
+    'agreements': 0,
+    'batches': 0,
+    'abs_delta_sum': 0.0,
+    'max_abs_delta': None,
+    'confusion': Counter(),
+}
+shadow_latencies_ms = deque(maxlen=SHADOW_LATENCY_WINDOW)
+
+def shadow_enqueue(features_array, probabilities):
+    """Hand a scored sample to the shadow workers without blocking"""
+    global shadow_dropped
+    if not shadow_enabled:
+        return
+    if shadow_pid != os.getpid():
+        start_shadow_workers()
+    try:
+        shadow_queue.put_nowait((features_array, probabilities))
+    except queue.Full:
+        with shadow_drop_lock:
+            shadow_dropped += 1
+
+def score_shadow_batch(batch):
+    """Score one batch with the candidate and fold the comparison into shadow_stats"""
+    try:
+        features_batch = np.vstack([item[0] for item in batch])
+        primary_probs = np.vstack([item[1] for item in batch])
+
+        start = time.perf_counter()
+        candidate_probs = np.asarray(shadow_model.predict_on_batch(features_batch))
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        primary_idx = np.argmax(primary_probs, axis=1)
+        candidate_idx = np.argmax(candidate_probs, axis=1)
+        abs_delta = np.abs(candidate_probs - primary_probs)
+
+        agreements = int(np.sum(primary_idx == candidate_idx))
+        abs_delta_sum = float(abs_delta.mean(axis=1).sum())
+        max_abs_delta = float(abs_delta.max())
+        pairs = Counter(
+            f"{CLASS_LABELS[p_idx]} -> {CLASS_LABELS[c_idx]}"
+            for p_idx, c_idx in zip(primary_idx, candidate_idx)
+        )
+    except Exception as e:
+        print(f"Shadow model error: {e}")
+        with shadow_lock:
+            shadow_stats['in_flight'] -= len(batch)
+            shadow_stats['errors'] += len(batch)
+        return
+
+    with shadow_lock:
+        shadow_stats['in_flight'] -= len(batch)
+        shadow_stats['batches'] += 1
+        shadow_stats['scored'] += len(batch)
+        shadow_stats['agreements'] += agreements
+        shadow_stats['abs_delta_sum'] += abs_delta_sum
+        shadow_stats['max_abs_delta'] = max(shadow_stats['max_abs_delta'] or 0.0, max_abs_delta)
+        shadow_stats['confusion'].update(pairs)
+        shadow_latencies_ms.append((elapsed_ms, len(batch)))
+
+def shadow_worker():
+    """Drain the shadow queue in batches and compare against the primary model"""
+    while True:
+        batch = [shadow_queue.get()]
+        while len(batch) < shadow_batch_size:
+            try:
+                batch.append(shadow_queue.get_nowait())
+            except queue.Empty:
+                break
+        with shadow_lock:
+            shadow_stats['received'] += len(batch)
+            shadow_stats['in_flight'] += len(batch)
+        score_shadow_batch(batch)
+
+def read_shadow_setting(name, default):
+    """Read a positive integer shadow setting, or return None if it is invalid"""
+    raw = os.environ.get(name, '')
+    if raw == '':
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        value = 0
+    if value < 1:
+        print(f"Shadow mode disabled: {name}={raw!r} is not a positive integer")
+        return None
+    return value
+
+def configure_shadow_mode():
+    """Validate shadow settings; the candidate itself is loaded on first use"""
+    global shadow_enabled, shadow_queue_size, shadow_workers, shadow_batch_size
+    if not shadow_model_path:
+        return
+    if model is None:
+        print("Shadow model disabled: primary model not loaded")
+        return
+
+    settings = [
+        read_shadow_setting('SHADOW_QUEUE_SIZE', shadow_queue_size),
+        read_shadow_setting('SHADOW_WORKERS', shadow_workers),
+        read_shadow_setting('SHADOW_BATCH_SIZE', shadow_batch_size),
+    ]
+    if None in settings:
+        return
+    shadow_queue_size, shadow_workers, shadow_batch_size = settings
+    shadow_enabled = True
+
+def start_shadow_workers():
+    """Create this process's queue and load the candidate in the background"""
+    global shadow_pid, shadow_queue, shadow_model
+    with shadow_start_lock:
+        if shadow_pid == os.getpid():
+            return
+        shadow_model = None
+        shadow_queue = queue.Queue(maxsize=shadow_queue_size)
+        shadow_pid = os.getpid()
+        threading.Thread(target=load_shadow_model, name='shadow-loader', daemon=True).start()
+
+def load_shadow_model():
+    global shadow_model, shadow_enabled
+    try:
+        candidate = tf.keras.models.load_model(shadow_model_path)
+    except Exception as e:
+        print(f"Error loading shadow model: {e}")
+        shadow_enabled = False
+        return
+
+    if candidate.input_shape != model.input_shape:
+        print(f"Shadow model disabled: input shape {candidate.input_shape} does not match primary {model.input_shape}")
+        shadow_enabled = False
+        return
+    if candidate.output_shape != model.output_shape or candidate.output_shape[-1] != len(CLASS_LABELS):
+        print(f"Shadow model disabled: output shape {candidate.output_shape} does not match primary "
+              f"{model.output_shape} with {len(CLASS_LABELS)} classes")
+        shadow_enabled = False
+        return
+
+    shadow_model = candidate
+    print(f"Shadow model loaded successfully from {shadow_model_path} (pid {os.getpid()})")
+    for i in range(shadow_workers):
+        threading.Thread(target=shadow_worker, name=f'shadow-worker-{i}', daemon=True).start()
+
 # Sample feature names based on the dataset structure
 # In a real application, you'd load these from a config file or the training data
 FEATURE_NAMES = [
@@ -36,6 +209,9 @@ FEATURE_NAMES = [
 # Class labels based on actual dataset fault types
 CLASS_LABELS = ['Line Breakage', 'Transformer Failure', 'Overheating']
 
+# Validate shadow settings on startup; workers start on the first request
+configure_shadow_mode()
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -91,6 +267,7 @@ def predict():
         
         # Get class probabilities
         probabilities = prediction[0]
+        shadow_enqueue(features_array, probabilities)
         predicted_class_idx = np.argmax(probabilities)
         predicted_class = CLASS_LABELS[predicted_class_idx]
         confidence = float(probabilities[predicted_class_idx])
@@ -235,5 +412,60 @@ def model_info():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/shadow-report', methods=['GET'])
+def shadow_report():
+    try:
+        if not shadow_enabled:
+            return jsonify({'error': 'Shadow mode not enabled'}), 404
+
+        if shadow_pid != os.getpid():
+            status = 'idle'  # this process has not served a prediction yet
+        elif shadow_model is None:
+            status = 'loading'
+        else:
+            status = 'running'
+
+        with shadow_lock:
+            stats = dict(shadow_stats)
+            confusion = dict(shadow_stats['confusion'])
+            latencies = list(shadow_latencies_ms)
+        with shadow_drop_lock:
+            dropped = shadow_dropped
+        queue_depth = shadow_queue.qsize() if status != 'idle' else 0
+
+        scored = stats['scored']
+        batch_ms = np.array([ms for ms, _ in latencies]) if latencies else None
+        per_sample_ms = np.array([ms / n for ms, n in latencies]) if latencies else None
+
+        return jsonify({
+            'shadow_model_path': shadow_model_path,
+            'primary_model_path': model_path,
+            'status': status,
+            'pid': os.getpid(),
+            'workers': shadow_workers,
+            'batch_size': shadow_batch_size,
+            'queue_depth': queue_depth,
+            'queue_capacity': shadow_queue_size,
+            'received': stats['received'],
+            'in_flight': stats['in_flight'],
+            'dropped': dropped,
+            'scored': scored,
+            'errors': stats['errors'],
+            'agreement_rate': round(stats['agreements'] / scored, 4) if scored else None,
+            'mean_abs_probability_delta': round(stats['abs_delta_sum'] / scored, 4) if scored else None,
+            'max_abs_probability_delta': round(stats['max_abs_delta'], 4) if scored else None,
+            'prediction_pairs': confusion,
+            'batches': stats['batches'],
+            # Latency covers only the most recent SHADOW_LATENCY_WINDOW batches
+            'latency_ms': {
+                'window_batches': len(latencies),
+                'mean_batch': round(float(batch_ms.mean()), 4),
+                'p95_batch': round(float(np.percentile(batch_ms, 95)), 4),
+                'mean_per_sample': round(float(per_sample_ms.mean()), 4),
+            } if latencies else None
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests for shadow model evaluation (no server or trained model needed)
+"""
+
+import os
+import queue
+from collections import Counter, deque
+
+import numpy as np
+import pytest
+
+import app
+
+
+class StubModel:
+    """Candidate model that returns fixed probabilities"""
+
+    def __init__(self, probabilities):
+        self.probabilities = np.array(probabilities)
+
+    def predict_on_batch(self, features):
+        return np.tile(self.probabilities, (len(features), 1))
+
+
+@pytest.fixture(autouse=True)
+def shadow_state(monkeypatch):
+    monkeypatch.setattr(app, 'shadow_stats', {
+        'received': 0,
+        'in_flight': 0,
+        'scored': 0,
+        'errors': 0,
+        'agreements': 0,
+        'batches': 0,
+        'abs_delta_sum': 0.0,
+        'max_abs_delta': None,
+        'confusion': Counter(),
+    })
+    monkeypatch.setattr(app, 'shadow_latencies_ms', deque(maxlen=app.SHADOW_LATENCY_WINDOW))
+    monkeypatch.setattr(app, 'shadow_dropped', 0)
+
+
+def make_batch(primary_rows):
+    batch = [(np.zeros((1, 522)), np.array(row)) for row in primary_rows]
+    app.shadow_stats['received'] += len(batch)
+    app.shadow_stats['in_flight'] += len(batch)
+    return batch
+
+
+def test_score_shadow_batch_records_agreement_and_deltas(monkeypatch):
+    monkeypatch.setattr(app, 'shadow_model', StubModel([0.7, 0.2, 0.1]))
+    batch = make_batch([
+        [0.6, 0.3, 0.1],  # agrees: Line Breakage
+        [0.1, 0.1, 0.8],  # disagrees: Overheating -> Line Breakage
+    ])
+
+    app.score_shadow_batch(batch)
+
+    stats = app.shadow_stats
+    assert stats['scored'] == 2
+    assert stats['errors'] == 0
+    assert stats['in_flight'] == 0
+    assert stats['batches'] == 1
+    assert stats['agreements'] == 1
+    # Mean per-row absolute deltas: (0.1+0.1+0.0)/3 and (0.6+0.1+0.7)/3
+    assert stats['abs_delta_sum'] == pytest.approx(0.2 / 3 + 1.4 / 3)
+    assert stats['max_abs_delta'] == pytest.approx(0.7)
+    assert stats['confusion'] == Counter({
+        'Line Breakage -> Line Breakage': 1,
+        'Overheating -> Line Breakage': 1,
+    })
+    assert len(app.shadow_latencies_ms) == 1
+
+
+def test_score_shadow_batch_counts_errors_on_shape_mismatch(monkeypatch):
+    monkeypatch.setattr(app, 'shadow_model', StubModel([0.25, 0.25, 0.25, 0.25]))
+    batch = make_batch([[0.6, 0.3, 0.1]] * 3)
+
+    app.score_shadow_batch(batch)
+
+    stats = app.shadow_stats
+    assert stats['errors'] == 3
+    assert stats['scored'] == 0
+    assert stats['in_flight'] == 0
+    assert stats['received'] == stats['scored'] + stats['errors']
+
+
+def test_shadow_enqueue_drops_when_queue_full(monkeypatch):
+    monkeypatch.setattr(app, 'shadow_enabled', True)
+    monkeypatch.setattr(app, 'shadow_pid', os.getpid())
+    monkeypatch.setattr(app, 'shadow_queue', queue.Queue(maxsize=1))
+
+    app.shadow_enqueue(np.zeros((1, 522)), np.array([0.6, 0.3, 0.1]))
+    app.shadow_enqueue(np.zeros((1, 522)), np.array([0.6, 0.3, 0.1]))
+
+    assert app.shadow_queue.qsize() == 1
+    assert app.shadow_dropped == 1
+
+
+@pytest.mark.parametrize('value', ['0', '-4', '', 'abc'])
+def test_invalid_shadow_settings_disable_shadow_mode(monkeypatch, value):
+    monkeypatch.setattr(app, 'shadow_model_path', 'candidate.keras')
+    monkeypatch.setattr(app, 'model', StubModel([1.0, 0.0, 0.0]))
+    monkeypatch.setattr(app, 'shadow_enabled', False)
+    monkeypatch.setattr(app, 'shadow_queue_size', 256)
+    monkeypatch.setattr(app, 'shadow_workers', 1)
+    monkeypatch.setattr(app, 'shadow_batch_size', 32)
+    monkeypatch.setenv('SHADOW_BATCH_SIZE', value)
+
+    app.configure_shadow_mode()
+
+    # An empty value falls back to the default; anything else below 1 is rejected
+    assert app.shadow_enabled == (value == '')